@@ -2,7 +2,7 @@
 
 {
     'name': 'Payment Provider: N-Genius',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.1.0',
     'category': 'Accounting/Payment Providers',
     'sequence': 350,
     'summary': "Accept card payments via N-Genius by Network International.",
@@ -20,16 +20,26 @@ Features:
 - Refund support
 - Webhook notifications
 - Hosted Payment Page (redirect flow)
+- Embedded card form (hosted sessions)
+- Routing to multiple outlets by currency and weight
+- Compressed archive of the raw gateway payloads for disputes
 
 For more information, visit: https://www.network.ae/en/solutions/partners/n-genius
     """,
     'depends': ['payment', 'account_payment'],
     'data': [
+        'security/ir.model.access.csv',
         'views/payment_provider_views.xml',
         'views/payment_ngenius_templates.xml',
         'data/account_payment_method_data.xml',
         'data/payment_provider_data.xml',
+        'data/ir_cron_data.xml',
     ],
+    'assets': {
+        'web.assets_frontend': [
+            'payment_provider_ngenius/static/src/interactions/payment_form.js',
+        ],
+    },
     'author': 'Ashraf',
     'website': 'https://www.ashrf.in',
     'maintainer': 'Ashraf',
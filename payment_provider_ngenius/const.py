@@ -2,7 +2,7 @@
 
 from odoo.addons.payment.const import SENSITIVE_KEYS as PAYMENT_SENSITIVE_KEYS
 
-SENSITIVE_KEYS = {'api_key', 'access_token', 'apiKey', 'Authorization'}
+SENSITIVE_KEYS = {'api_key', 'access_token', 'apiKey', 'Authorization', 'webhook_secret'}
 PAYMENT_SENSITIVE_KEYS.update(SENSITIVE_KEYS)  # Add N-Genius-specific keys to the global set.
 
 # N-Genius API Configuration
@@ -12,6 +12,12 @@ AUTH_ENDPOINT = '/identity/auth/access-token'
 ORDER_ENDPOINT = '/transactions/outlets/{outlet_ref}/orders'
 ORDER_DETAIL_ENDPOINT = '/transactions/outlets/{outlet_ref}/orders/{order_ref}'
 REFUND_ENDPOINT = '/transactions/outlets/{outlet_ref}/orders/{order_ref}/payments/{payment_ref}/refund'
+HOSTED_SESSION_PAYMENT_ENDPOINT = '/transactions/outlets/{outlet_ref}/payment/hosted-session/{session_id}'
+HOSTED_SESSION_ID_PATTERN = r'[a-zA-Z0-9\-]{1,64}'  # Keeps the session id a single path segment.
+
+# N-Genius Hosted Sessions SDK (embedded card form)
+SDK_URL_SANDBOX = 'https://paypage.sandbox.ngenius-payments.com/hosted-sessions/sdk.js'
+SDK_URL_LIVE = 'https://paypage.ngenius-payments.com/hosted-sessions/sdk.js'
 
 # The codes of the payment methods to activate when N-Genius is activated.
 DEFAULT_PAYMENT_METHOD_CODES = {
@@ -47,6 +53,15 @@ HANDLED_WEBHOOK_EVENTS = [
     'FAILED',
 ]
 
+# Webhook pre-filter, applied before parsing the payload and accessing the database.
+WEBHOOK_SECRET_HEADER = 'X-NGenius-Webhook-Secret'  # The shared secret, sent as-is.
+WEBHOOK_SIGNATURE_HEADER = 'X-NGenius-Signature'  # The hex HMAC-SHA256 of the body.
+WEBHOOK_MAX_BODY_SIZE = 64 * 1024  # In bytes.
+WEBHOOK_RATE_LIMIT_BURST = 20  # The number of requests a source IP can send at once.
+WEBHOOK_RATE_LIMIT_REFILL = 5  # The number of requests per second a source IP regains.
+WEBHOOK_RATE_LIMIT_MAX_SOURCES = 10000  # The number of source IPs tracked at most.
+WEBHOOK_REJECTIONS_LOG_INTERVAL = 1000  # The number of rejections of a reason between info logs.
+
 # Currency code to minor units multiplier (N-Genius uses minor units)
 # Most currencies use 100 (e.g., USD cents, EUR cents, AED fils)
 # Exceptions are listed below
@@ -76,3 +91,7 @@ CURRENCY_DECIMALS = {
     'TND': 3,
 }
 
+# Archive of the raw gateway payloads, kept for disputes.
+PAYLOAD_ARCHIVE_BATCH_SIZE = 1000  # The number of queued payloads archived at once by the cron.
+PAYLOAD_ARCHIVE_COMPRESSION = 6  # The zlib compression level.
+PAYLOAD_ARCHIVE_RETENTION_MONTHS = 24  # Overridden by `payment_provider_ngenius.payload_retention_months`.
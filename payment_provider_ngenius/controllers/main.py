@@ -1,19 +1,49 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from odoo import http
+import json
+import threading
+from collections import Counter
+
+from werkzeug.exceptions import Forbidden
+
+from odoo import _, http
 from odoo.exceptions import ValidationError
 from odoo.http import request
 from odoo.tools import mute_logger
 
+from odoo.addons.payment import utils as payment_utils
 from odoo.addons.payment.logging import get_payment_logger
 from odoo.addons.payment_provider_ngenius import const
+from odoo.addons.payment_provider_ngenius import utils as ngenius_utils
 
 _logger = get_payment_logger(__name__, const.SENSITIVE_KEYS)
 
+# The number of webhook requests rejected by the pre-filter, per reason.
+_webhook_rejections = Counter()
+_webhook_rejections_lock = threading.Lock()
+
+_webhook_throttle = ngenius_utils.TokenBucketThrottle(
+    const.WEBHOOK_RATE_LIMIT_BURST,
+    const.WEBHOOK_RATE_LIMIT_REFILL,
+    const.WEBHOOK_RATE_LIMIT_MAX_SOURCES,
+)
+
+
+def get_webhook_rejections():
+    """Return the number of webhook requests rejected by the pre-filter of this process.
+
+    :return: The number of rejections, per reason.
+    :rtype: dict
+    """
+    with _webhook_rejections_lock:
+        return dict(_webhook_rejections)
+
 
 class NGeniusController(http.Controller):
     _return_url = '/payment/ngenius/return'
     _webhook_url = '/payment/ngenius/webhook'
+    _hosted_session_url = '/payment/ngenius/hosted_session'
+    _hosted_session_verify_url = '/payment/ngenius/hosted_session/verify'
 
     @http.route(_return_url, type='http', methods=['GET'], auth='public', csrf=False)
     def ngenius_return(self, **data):
@@ -46,26 +76,7 @@ class NGeniusController(http.Controller):
         
         # Fetch order details from N-Genius API
         try:
-            order_ref_to_fetch = order_ref or tx_sudo.provider_reference
-            if order_ref_to_fetch:
-                access_token = tx_sudo.provider_id._ngenius_get_access_token()
-                outlet_ref = tx_sudo.provider_id.ngenius_outlet_ref
-                endpoint = const.ORDER_DETAIL_ENDPOINT.format(
-                    outlet_ref=outlet_ref, order_ref=order_ref_to_fetch
-                )
-                order_data = tx_sudo.provider_id._ngenius_make_request(
-                    'GET', endpoint, access_token=access_token
-                )
-                
-                # Process the payment data
-                payment_data = {
-                    'reference': tx_sudo.reference,
-                    'order_data': order_data,
-                }
-                tx_sudo._process('ngenius', payment_data)
-            else:
-                _logger.warning("N-Genius: No order reference to fetch - cannot verify payment")
-                tx_sudo._set_error("Payment could not be verified - no order reference")
+            tx_sudo._ngenius_fetch_order_data(order_ref=order_ref)
         except ValidationError as e:
             _logger.exception("Failed to process the return from N-Genius")
             tx_sudo._set_error(str(e))
@@ -77,23 +88,110 @@ class NGeniusController(http.Controller):
         with mute_logger('werkzeug'):
             return request.redirect('/payment/status')
 
+    @http.route(_hosted_session_url, type='jsonrpc', auth='public')
+    def ngenius_hosted_session_payment(self, reference, access_token, session_id, outlet_ref):
+        """Pay the transaction with the hosted session generated by the embedded card form.
+
+        :param str reference: The reference of the transaction.
+        :param str access_token: The access token used to authenticate the request.
+        :param str session_id: The hosted session id generated by the N-Genius SDK.
+        :param str outlet_ref: The outlet the embedded card form was mounted for.
+        :return: The payment data, needed by the SDK to run a 3DS challenge.
+        :rtype: dict
+        """
+        tx_sudo = self._ngenius_get_hosted_session_tx(reference, access_token)
+        return tx_sudo._ngenius_create_hosted_session_payment(session_id, outlet_ref)
+
+    @http.route(_hosted_session_verify_url, type='jsonrpc', auth='public')
+    def ngenius_hosted_session_verify(self, reference, access_token):
+        """Verify the payment of the transaction once the 3DS challenge is completed.
+
+        :param str reference: The reference of the transaction.
+        :param str access_token: The access token used to authenticate the request.
+        :return: None
+        """
+        tx_sudo = self._ngenius_get_hosted_session_tx(reference, access_token)
+        tx_sudo._ngenius_fetch_order_data()
+
+    @staticmethod
+    def _ngenius_get_hosted_session_tx(reference, access_token):
+        """Return the transaction paid through the embedded card form, if the request is genuine.
+
+        :param str reference: The reference of the transaction.
+        :param str access_token: The access token used to authenticate the request.
+        :return: The sudoed transaction.
+        :rtype: payment.transaction
+        :raise Forbidden: If the access token is invalid.
+        :raise ValidationError: If no transaction matches the reference, or if its provider does not
+                                use the embedded card form.
+        """
+        if not payment_utils.check_access_token(access_token, reference):
+            raise Forbidden()
+
+        tx_sudo = request.env['payment.transaction'].sudo()._search_by_reference(
+            'ngenius', {'reference': reference}
+        )
+        if not tx_sudo:
+            raise ValidationError(_("N-Genius: No transaction found matching reference %s", reference))
+        if tx_sudo.provider_id.ngenius_payment_flow != 'embedded':
+            raise ValidationError(_("N-Genius: The embedded card form is not enabled"))
+        return tx_sudo
+
     @http.route(_webhook_url, type='http', methods=['POST'], auth='public', csrf=False)
     def ngenius_webhook(self):
         """Process the payment data sent by N-Genius to the webhook.
 
+        The request is first run through a pre-filter that rejects throttled, oversized,
+        unauthenticated and unhandled notifications before any parsing or database access.
+
         :return: An empty string to acknowledge the notification.
         :rtype: str
         """
-        event = request.get_json_data()
-        
+        httprequest = request.httprequest
+
+        if not _webhook_throttle.allow(httprequest.remote_addr):
+            return self._ngenius_reject_webhook('throttled', 429)
+
+        if (httprequest.content_length or 0) > const.WEBHOOK_MAX_BODY_SIZE:
+            return self._ngenius_reject_webhook('too_large', 413)
+        # Never read more than the cap, as chunked requests have no content length.
+        body = httprequest.stream.read(const.WEBHOOK_MAX_BODY_SIZE + 1)
+        if len(body) > const.WEBHOOK_MAX_BODY_SIZE:
+            return self._ngenius_reject_webhook('too_large', 413)
+
+        secrets = request.env['payment.provider']._ngenius_get_webhook_secrets()
+        if secrets and not ngenius_utils.check_webhook_signature(
+            body,
+            httprequest.headers.get(const.WEBHOOK_SECRET_HEADER),
+            httprequest.headers.get(const.WEBHOOK_SIGNATURE_HEADER),
+            secrets,
+        ):
+            return self._ngenius_reject_webhook('bad_signature', 403)
+
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return self._ngenius_reject_webhook('malformed', 400)
+        if not isinstance(event, dict):
+            return self._ngenius_reject_webhook('malformed', 400)
+
+        if event.get('eventName') not in const.HANDLED_WEBHOOK_EVENTS:
+            # Acknowledge the notification to prevent N-Genius from sending it again.
+            return self._ngenius_reject_webhook('unhandled_event', 200)
+
         try:
             # Extract transaction reference and order data
             reference = event.get('merchantOrderReference')
+            tx_sudo = request.env['payment.transaction'].sudo()
+            if reference:
+                tx_sudo = tx_sudo._search_by_reference('ngenius', {'reference': reference})
+
+            # Archive under the transaction reference, like the order and refund payloads
+            request.env['payment.ngenius.payload'].sudo()._ngenius_archive(
+                tx_sudo[:1].reference or reference, 'webhook', event
+            )
+
             if reference:
-                tx_sudo = request.env['payment.transaction'].sudo()._search_by_reference(
-                    'ngenius', {'reference': reference}
-                )
-                
                 # Process the webhook data
                 payment_data = {
                     'reference': reference,
@@ -104,3 +202,23 @@ class NGeniusController(http.Controller):
             _logger.exception("Unable to process the webhook; skipping to acknowledge")
         
         return request.make_json_response('')
+
+    @staticmethod
+    def _ngenius_reject_webhook(reason, status):
+        """Count the rejection of a webhook request and return the response to send.
+
+        :param str reason: The reason of the rejection, used as counter key.
+        :param int status: The HTTP status of the response.
+        :return: The response to the webhook request.
+        :rtype: Response
+        """
+        with _webhook_rejections_lock:
+            _webhook_rejections[reason] += 1
+            count = _webhook_rejections[reason]
+        _logger.debug(
+            "N-Genius: Rejected webhook from %s (%s, %d so far)",
+            request.httprequest.remote_addr, reason, count,
+        )
+        if count == 1 or count % const.WEBHOOK_REJECTIONS_LOG_INTERVAL == 0:
+            _logger.info("N-Genius: Webhook rejections so far: %s", get_webhook_rejections())
+        return request.make_json_response('', status=status)
@@ -0,0 +1,19 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Set the embedded card form on the existing N-Genius providers.
+
+    The provider data is `noupdate`, so upgraded databases would otherwise keep the redirect flow
+    even when the embedded card form is selected.
+    """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    inline_form = env.ref('payment_provider_ngenius.inline_form', raise_if_not_found=False)
+    if not inline_form:
+        return
+
+    env['payment.provider'].search([
+        ('code', '=', 'ngenius'), ('inline_form_view_id', '=', False),
+    ]).inline_form_view_id = inline_form
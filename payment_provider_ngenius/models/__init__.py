@@ -1,4 +1,7 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+from . import payment_ngenius_payload
+from . import payment_ngenius_payload_queue
 from . import payment_provider
+from . import payment_provider_ngenius_outlet
 from . import payment_transaction
@@ -0,0 +1,205 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import functools
+import json
+import zlib
+
+from dateutil.relativedelta import relativedelta
+from psycopg2 import Binary
+
+from odoo import api, fields, models
+
+from odoo.addons.payment.logging import get_payment_logger
+from odoo.addons.payment_provider_ngenius import const
+
+_logger = get_payment_logger(__name__, const.SENSITIVE_KEYS)
+
+
+class PaymentNGeniusPayload(models.Model):
+    _name = 'payment.ngenius.payload'
+    _description = "N-Genius Payload Archive"
+    _order = 'id desc'
+    _log_access = False
+
+    reference = fields.Char(string="Transaction Reference", readonly=True, index=True)
+    kind = fields.Selection(
+        string="Kind",
+        selection=[('order', "Order"), ('refund', "Refund"), ('webhook', "Webhook")],
+        readonly=True,
+    )
+    month = fields.Char(
+        string="Month",
+        help="The month the payload was received in, as YYYY-MM, by which payloads are purged",
+        readonly=True,
+        index=True,
+    )
+    received_at = fields.Datetime(string="Received At", readonly=True)
+    # The raw zlib bytes are written and read in SQL, bypassing the base64 encoding of the ORM that
+    # would make every row a third larger.
+    data = fields.Binary(
+        string="Compressed Data",
+        help="The zlib-compressed JSON payload, with the sensitive keys redacted",
+        readonly=True,
+        attachment=False,
+    )
+
+    # === BUSINESS METHODS === #
+
+    @api.model
+    def _ngenius_archive(self, reference, kind, payload):
+        """Queue a raw gateway payload for archiving.
+
+        The payload is redacted right away and batched with the other payloads of the current
+        transaction. The batch is inserted in the archive queue with a single query just before the
+        transaction is committed, or with a separate cursor once it is rolled back, so that the
+        payloads survive a failed request; a rolled back request that is retried queues its payloads
+        again. The compression and archiving of the queued payloads are done in batches by a cron.
+
+        :param str reference: The reference of the transaction the payload relates to.
+        :param str kind: The kind of payload: `order`, `refund` or `webhook`.
+        :param dict payload: The payload received from N-Genius.
+        :return: None
+        """
+        vals = (reference, kind, fields.Datetime.now(), json.dumps(_redact(payload)))
+
+        cr = self.env.cr
+        batch = cr.precommit.data.get(self._name)
+        if batch is None:
+            batch = cr.precommit.data[self._name] = []
+            cr.precommit.add(functools.partial(self._ngenius_insert_queue, cr, batch))
+            cr.postrollback.add(functools.partial(
+                self._ngenius_insert_queue_after_rollback, self.env.registry, batch
+            ))
+        batch.append(vals)
+
+    @api.model
+    def _ngenius_insert_queue(self, cr, batch):
+        """Insert a batch of payloads in the archive queue in a single query.
+
+        :param Cursor cr: The cursor to insert the payloads with.
+        :param list batch: The reference, kind, reception date and JSON payload of each payload.
+        :return: None
+        """
+        if not batch:
+            return
+
+        cr.execute(f'''
+            INSERT INTO "{self.env['payment.ngenius.payload.queue']._table}"
+                (reference, kind, received_at, payload)
+            VALUES {', '.join(['(%s, %s, %s, %s)'] * len(batch))}
+        ''', [value for vals in batch for value in vals])
+
+    @api.model
+    def _ngenius_insert_queue_after_rollback(self, registry, batch):
+        """Insert a batch of payloads in the archive queue once their transaction is rolled back.
+
+        :param Registry registry: The registry of the database to insert the payloads in.
+        :param list batch: The reference, kind, reception date and JSON payload of each payload.
+        :return: None
+        """
+        try:
+            with registry.cursor() as cr:
+                self._ngenius_insert_queue(cr, batch)
+        except Exception:
+            _logger.exception("N-Genius: Unable to queue %d payloads for archiving", len(batch))
+
+    @api.model
+    def _ngenius_get_payloads(self, reference):
+        """Return the archived and queued payloads of a transaction, oldest first.
+
+        :param str reference: The reference of the transaction.
+        :return: The kind, the reception date and the decompressed payload of each archive.
+        :rtype: list[dict]
+        """
+        self.env.cr.execute(f'''
+            SELECT kind, received_at, data FROM "{self._table}" WHERE reference = %s ORDER BY id
+        ''', [reference])
+        payloads = [{
+            'kind': kind,
+            'received_at': received_at,
+            'payload': json.loads(zlib.decompress(data)),
+        } for kind, received_at, data in self.env.cr.fetchall()]
+
+        # The payloads not archived yet are more recent than the archived ones.
+        self.env.cr.execute(f'''
+            SELECT kind, received_at, payload FROM "{self.env['payment.ngenius.payload.queue']._table}"
+            WHERE reference = %s ORDER BY id
+        ''', [reference])
+        payloads += [{
+            'kind': kind,
+            'received_at': received_at,
+            'payload': json.loads(payload),
+        } for kind, received_at, payload in self.env.cr.fetchall()]
+        return payloads
+
+    @api.model
+    def _cron_archive_queue(self):
+        """Compress a batch of queued payloads and move them to the archive.
+
+        The cron is triggered again if more payloads are queued.
+
+        :return: None
+        """
+        queue_table = self.env['payment.ngenius.payload.queue']._table
+        self.env.cr.execute(f'''
+            SELECT id, reference, kind, received_at, payload FROM "{queue_table}"
+            ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+        ''', [const.PAYLOAD_ARCHIVE_BATCH_SIZE])
+        queued_payloads = self.env.cr.fetchall()
+        if not queued_payloads:
+            return
+
+        rows = [(
+            reference,
+            kind,
+            received_at.strftime('%Y-%m'),
+            received_at,
+            Binary(zlib.compress(payload.encode(), const.PAYLOAD_ARCHIVE_COMPRESSION)),
+        ) for _id, reference, kind, received_at, payload in queued_payloads]
+        self.env.cr.execute(f'''
+            INSERT INTO "{self._table}" (reference, kind, month, received_at, data)
+            VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))}
+        ''', [value for row in rows for value in row])
+        self.env.cr.execute(
+            f'DELETE FROM "{queue_table}" WHERE id IN %s',
+            [tuple(queued_payload[0] for queued_payload in queued_payloads)],
+        )
+        _logger.info("N-Genius: Archived %d queued payloads", len(queued_payloads))
+
+        if len(queued_payloads) == const.PAYLOAD_ARCHIVE_BATCH_SIZE:
+            self.env.ref('payment_provider_ngenius.cron_archive_payload_queue')._trigger()
+
+    @api.model
+    def _cron_purge_archive(self):
+        """Delete the payloads of the months past the retention period.
+
+        :return: None
+        """
+        retention_months = int(self.env['ir.config_parameter'].sudo().get_param(
+            'payment_provider_ngenius.payload_retention_months',
+            const.PAYLOAD_ARCHIVE_RETENTION_MONTHS,
+        ))
+        oldest_month = (fields.Date.today() - relativedelta(months=retention_months)).strftime('%Y-%m')
+        # Delete the rows of the expired months through the index on `month`, bypassing the ORM
+        # for the volume. The table itself is not partitioned.
+        self.env.cr.execute(f'DELETE FROM "{self._table}" WHERE month < %s', [oldest_month])
+        _logger.info(
+            "N-Genius: Purged %d archived payloads older than %s", self.env.cr.rowcount, oldest_month
+        )
+
+
+def _redact(data):
+    """Return a copy of the data with the values of the sensitive keys redacted.
+
+    :param dict|list data: The data to redact.
+    :return: The redacted data.
+    :rtype: dict|list
+    """
+    if isinstance(data, dict):
+        return {
+            key: '[REDACTED]' if key in const.SENSITIVE_KEYS else _redact(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_redact(value) for value in data]
+    return data
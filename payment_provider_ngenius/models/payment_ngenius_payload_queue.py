@@ -0,0 +1,19 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import fields, models
+
+
+class PaymentNGeniusPayloadQueue(models.Model):
+    _name = 'payment.ngenius.payload.queue'
+    _description = "N-Genius Payload Archive Queue"
+    _order = 'id'
+    _log_access = False
+
+    reference = fields.Char(string="Transaction Reference", readonly=True, index=True)
+    kind = fields.Char(string="Kind", readonly=True)
+    received_at = fields.Datetime(string="Received At", readonly=True)
+    payload = fields.Text(
+        string="Payload",
+        help="The JSON payload, with the sensitive keys redacted, waiting to be archived",
+        readonly=True,
+    )
@@ -1,10 +1,15 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import json
+import random
+from collections import defaultdict
+from types import MappingProxyType
+
 import requests
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import ormcache
 
 from odoo.addons.payment import utils as payment_utils
 from odoo.addons.payment.logging import get_payment_logger
@@ -33,6 +38,37 @@ class PaymentProvider(models.Model):
         required_if_provider='ngenius',
         copy=False,
     )
+    ngenius_outlet_ids = fields.One2many(
+        string="Outlets",
+        help="The outlets to route the payments to, by currency and weight. Payments are routed "
+             "to the default outlet reference when no outlet matches their currency.",
+        comodel_name='payment.provider.ngenius.outlet',
+        inverse_name='provider_id',
+        context={'active_test': False},  # Keep the archived outlets in the form to restore them.
+    )
+    ngenius_payment_flow = fields.Selection(
+        string="Payment Flow",
+        help="Redirect the customer to the N-Genius payment page, or render the card form "
+             "directly on the payment page using N-Genius hosted sessions.",
+        selection=[
+            ('redirect', "Hosted Payment Page"),
+            ('embedded', "Embedded Card Form"),
+        ],
+        default='redirect',
+    )
+    ngenius_hosted_session_key = fields.Char(
+        string="Hosted Session API Key",
+        help="The public API key of the hosted session service account, used by the embedded "
+             "card form",
+        copy=False,
+    )
+    ngenius_webhook_secret = fields.Char(
+        string="Webhook Secret",
+        help="The shared secret that N-Genius sends in the webhook header, or uses to sign the "
+             "webhook body. Webhooks are not authenticated if left empty.",
+        copy=False,
+        groups='base.group_system',
+    )
 
     # === COMPUTE METHODS === #
 
@@ -58,8 +94,43 @@ class PaymentProvider(models.Model):
                         "the N-Genius payment provider."
                     ))
 
+    @api.constrains('state', 'ngenius_payment_flow', 'ngenius_hosted_session_key')
+    def _check_ngenius_hosted_session_key(self):
+        """Check that the hosted session key is set when the embedded card form is used."""
+        for provider in self:
+            if (
+                provider.code == 'ngenius'
+                and provider.state != 'disabled'
+                and provider.ngenius_payment_flow == 'embedded'
+                and not provider.ngenius_hosted_session_key
+            ):
+                raise ValidationError(_(
+                    "You must configure the Hosted Session API Key to use the embedded card form."
+                ))
+
     # === CRUD METHODS === #
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        providers = super().create(vals_list)
+        if any(provider.code == 'ngenius' for provider in providers):
+            self.env.registry.clear_cache()  # Reset the cached configuration and outlets.
+        return providers
+
+    def write(self, vals):
+        was_ngenius = any(provider.code == 'ngenius' for provider in self)
+        res = super().write(vals)
+        if was_ngenius or any(provider.code == 'ngenius' for provider in self):
+            self.env.registry.clear_cache()  # Reset the cached configuration and outlets.
+        return res
+
+    def unlink(self):
+        was_ngenius = any(provider.code == 'ngenius' for provider in self)
+        res = super().unlink()
+        if was_ngenius:
+            self.env.registry.clear_cache()  # Reset the cached configuration and outlets.
+        return res
+
     def _get_default_payment_method_codes(self):
         """Override of `payment` to return the default payment method codes."""
         self.ensure_one()
@@ -69,6 +140,149 @@ class PaymentProvider(models.Model):
 
     # === BUSINESS METHODS - PAYMENT FLOW === #
 
+    def _should_build_inline_form(self, is_validation=False):
+        """Override of `payment` to only build the inline form for the embedded card form."""
+        if self.code != 'ngenius':
+            return super()._should_build_inline_form(is_validation=is_validation)
+        return self.ngenius_payment_flow == 'embedded'
+
+    def _ngenius_get_inline_form_values(self, currency=None):
+        """Return a serialized JSON of the values needed to mount the embedded card form.
+
+        Note: `self.ensure_one()`
+
+        :param res.currency currency: The currency of the payment, used to route it to an outlet.
+        :return: The JSON serial of the inline form values.
+        :rtype: str
+        """
+        self.ensure_one()
+
+        config = self._ngenius_get_config()
+        inline_form_values = {
+            'sdk_url': config['sdk_url'],
+            'api_key': config['hosted_session_key'],
+            'outlet_ref': self._ngenius_select_outlet_ref(currency),
+        }
+        return json.dumps(inline_form_values)
+
+    @ormcache('self.id')
+    def _ngenius_get_outlet_routing(self):
+        """Return the routing map of the active outlets of the provider.
+
+        The map is cached so that routing a payment costs no query.
+
+        Note: `self.ensure_one()`
+
+        :return: The outlet references and their weights, by currency name. The outlets without
+                 currency are mapped to `None`.
+        :rtype: dict
+        """
+        self.ensure_one()
+
+        routing = defaultdict(lambda: ([], []))
+        # Filter explicitly, as the cache key ignores the `active_test` context.
+        for outlet in self.sudo().ngenius_outlet_ids.filtered('active'):
+            outlet_refs, weights = routing[outlet.currency_id.name or None]
+            outlet_refs.append(outlet.outlet_ref)
+            weights.append(outlet.weight)
+        return {
+            currency_name: (tuple(outlet_refs), tuple(weights))
+            for currency_name, (outlet_refs, weights) in routing.items()
+        }
+
+    def _ngenius_get_outlet_candidates(self, currency=None):
+        """Return the outlets a payment in the given currency can be routed to.
+
+        These are the outlets of the currency, or else the outlets without currency, or else the
+        default outlet reference.
+
+        Note: `self.ensure_one()`
+
+        :param res.currency currency: The currency of the payment, if known.
+        :return: The outlet references and their weights
+        :rtype: tuple
+        """
+        self.ensure_one()
+
+        routing = self._ngenius_get_outlet_routing()
+        outlet_refs, weights = routing.get(currency and currency.name) or routing.get(None, ((), ()))
+        if not outlet_refs:
+            return (self._ngenius_get_config()['outlet_ref'],), (1,)
+        return outlet_refs, weights
+
+    def _ngenius_select_outlet_ref(self, currency=None):
+        """Select the outlet to route a payment in the given currency to, at random by weight.
+
+        Note: `self.ensure_one()`
+
+        :param res.currency currency: The currency of the payment, if known.
+        :return: The outlet reference
+        :rtype: str
+        """
+        self.ensure_one()
+
+        outlet_refs, weights = self._ngenius_get_outlet_candidates(currency)
+        return random.choices(outlet_refs, weights=weights)[0]
+
+    def _ngenius_is_outlet_ref_allowed(self, outlet_ref, currency=None):
+        """Return whether a payment in the given currency can be routed to the outlet.
+
+        Note: `self.ensure_one()`
+
+        :param str outlet_ref: The outlet reference to check.
+        :param res.currency currency: The currency of the payment, if known.
+        :return: Whether the outlet reference is allowed
+        :rtype: bool
+        """
+        self.ensure_one()
+
+        outlet_refs, _weights = self._ngenius_get_outlet_candidates(currency)
+        return outlet_ref in outlet_refs
+
+    @api.model
+    @ormcache()
+    def _ngenius_get_webhook_secrets(self):
+        """Return the webhook secrets of the active N-Genius providers.
+
+        The result is cached so that webhook requests are authenticated without any query.
+
+        :return: The webhook secrets
+        :rtype: tuple
+        """
+        providers_sudo = self.sudo().search([
+            ('code', '=', 'ngenius'), ('state', '!=', 'disabled'),
+        ])
+        return tuple(
+            provider.ngenius_webhook_secret
+            for provider in providers_sudo
+            if provider.ngenius_webhook_secret
+        )
+
+    @ormcache('self.id')
+    def _ngenius_get_config(self):
+        """Return a read-only snapshot of the N-Genius configuration of the provider.
+
+        The snapshot is cached per process and reset whenever a provider is written, so that hot
+        paths read the configuration without any query or access rights check.
+
+        Note: `self.ensure_one()`
+
+        :return: The API and SDK URLs, the default outlet, the credentials and the redirect base URL
+        :rtype: mappingproxy
+        """
+        self.ensure_one()
+
+        provider_sudo = self.sudo()
+        is_test = provider_sudo.state == 'test'
+        return MappingProxyType({
+            'api_url': const.API_URL_SANDBOX if is_test else const.API_URL_LIVE,
+            'sdk_url': const.SDK_URL_SANDBOX if is_test else const.SDK_URL_LIVE,
+            'outlet_ref': ngenius_utils.get_outlet_ref(provider_sudo),
+            'api_key': ngenius_utils.get_api_key(provider_sudo),
+            'hosted_session_key': provider_sudo.ngenius_hosted_session_key,
+            'base_url': provider_sudo.get_base_url(),
+        })
+
     def _ngenius_get_api_url(self):
         """Return the appropriate API URL based on the provider state.
 
@@ -76,7 +290,7 @@ class PaymentProvider(models.Model):
         :rtype: str
         """
         self.ensure_one()
-        return const.API_URL_SANDBOX if self.state == 'test' else const.API_URL_LIVE
+        return self._ngenius_get_config()['api_url']
 
     def _ngenius_get_access_token(self):
         """Get an access token from N-Genius API.
@@ -87,9 +301,9 @@ class PaymentProvider(models.Model):
         """
         self.ensure_one()
         
-        api_url = self._ngenius_get_api_url()
-        endpoint = f"{api_url}{const.AUTH_ENDPOINT}"
-        api_key = ngenius_utils.get_api_key(self.sudo())
+        config = self._ngenius_get_config()
+        endpoint = f"{config['api_url']}{const.AUTH_ENDPOINT}"
+        api_key = config['api_key']
 
         headers = {
             'Authorization': f'Basic {api_key}',
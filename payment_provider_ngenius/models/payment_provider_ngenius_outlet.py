@@ -0,0 +1,54 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+
+
+class PaymentProviderNGeniusOutlet(models.Model):
+    _name = 'payment.provider.ngenius.outlet'
+    _description = "N-Genius Outlet"
+    _order = 'provider_id, sequence, id'
+
+    provider_id = fields.Many2one(
+        string="Provider", comodel_name='payment.provider', required=True, ondelete='cascade',
+    )
+    sequence = fields.Integer(default=10)
+    outlet_ref = fields.Char(
+        string="Outlet Reference",
+        help="The outlet reference ID from your N-Genius account",
+        required=True,
+    )
+    currency_id = fields.Many2one(
+        string="Currency",
+        help="The currency routed to this outlet. Leave empty to route any currency without a "
+             "dedicated outlet.",
+        comodel_name='res.currency',
+    )
+    weight = fields.Integer(
+        string="Weight",
+        help="The share of the traffic routed to this outlet among the outlets of the same "
+             "currency",
+        default=1,
+    )
+    active = fields.Boolean(default=True)
+
+    _weight_positive = models.Constraint(
+        'CHECK(weight > 0)', "The weight of an outlet must be strictly positive.",
+    )
+
+    # === CRUD METHODS === #
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        outlets = super().create(vals_list)
+        self.env.registry.clear_cache()  # Reset the cached outlet routing.
+        return outlets
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()  # Reset the cached outlet routing.
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()  # Reset the cached outlet routing.
+        return res
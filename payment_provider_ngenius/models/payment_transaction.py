@@ -4,7 +4,7 @@ import re
 
 from werkzeug.urls import url_encode
 
-from odoo import _, models
+from odoo import _, fields, models
 from odoo.exceptions import ValidationError
 from odoo.tools.urls import urljoin as url_join
 
@@ -20,6 +20,29 @@ _logger = get_payment_logger(__name__, const.SENSITIVE_KEYS)
 class PaymentTransaction(models.Model):
     _inherit = 'payment.transaction'
 
+    ngenius_outlet_ref = fields.Char(
+        string="N-Genius Outlet Reference",
+        help="The outlet the payment was routed to",
+        readonly=True,
+    )
+
+    def _get_specific_processing_values(self, processing_values):
+        """Override of payment to return N-Genius-specific processing values.
+
+        Note: self.ensure_one() from `_get_processing_values`
+
+        :param dict processing_values: The generic processing values of the transaction
+        :return: The dict of provider-specific processing values
+        :rtype: dict
+        """
+        res = super()._get_specific_processing_values(processing_values)
+        if self.provider_code != 'ngenius' or self.operation == 'online_token':
+            return res
+
+        return {
+            'access_token': payment_utils.generate_access_token(processing_values['reference']),
+        }
+
     def _get_specific_rendering_values(self, processing_values):
         """Override of payment to return N-Genius-specific rendering values.
 
@@ -47,20 +70,16 @@ class PaymentTransaction(models.Model):
             'api_params': params,
         }
 
-    def _ngenius_create_order(self):
-        """Create an N-Genius order for the transaction.
+    def _ngenius_prepare_payment_payload(self):
+        """Prepare the payload shared by order creation and hosted session payments.
 
-        :return: The order data from N-Genius
+        Note: self.ensure_one()
+
+        :return: The N-Genius payment payload
         :rtype: dict
-        :raise ValidationError: If order creation fails
         """
         self.ensure_one()
 
-        access_token = self.provider_id._ngenius_get_access_token()
-        outlet_ref = ngenius_utils.get_outlet_ref(self.provider_id.sudo())
-        endpoint = const.ORDER_ENDPOINT.format(outlet_ref=outlet_ref)
-
-        # Prepare order payload
         billing_address = ngenius_utils.include_billing_address(self)
         amount_minor = payment_utils.to_minor_currency_units(
             self.amount,
@@ -71,25 +90,42 @@ class PaymentTransaction(models.Model):
         # Sanitize reference: N-Genius only accepts [a-zA-Z0-9\-]{1,37}
         sanitized_reference = re.sub(r'[^a-zA-Z0-9\-]', '-', self.reference)[:37]
 
-        # Build redirect URL that includes the Odoo transaction reference
-        base_url = self.provider_id.get_base_url()
-        redirect_url = f"{base_url}{NGeniusController._return_url}?{url_encode({'reference': self.reference})}"
-
-        payload = {
+        return {
             'action': 'PURCHASE',
             'amount': {
                 'currencyCode': self.currency_id.name,
                 'value': amount_minor,
             },
-            'merchantAttributes': {
-                'redirectUrl': redirect_url,
-                'skipConfirmationPage': True,
-            },
             'merchantOrderReference': sanitized_reference,
             'emailAddress': self.partner_email or '',
             'billingAddress': billing_address,
         }
 
+    def _ngenius_create_order(self):
+        """Create an N-Genius order for the transaction.
+
+        :return: The order data from N-Genius
+        :rtype: dict
+        :raise ValidationError: If order creation fails
+        """
+        self.ensure_one()
+
+        access_token = self.provider_id._ngenius_get_access_token()
+        outlet_ref = self.provider_id._ngenius_select_outlet_ref(self.currency_id)
+        self.ngenius_outlet_ref = outlet_ref
+        endpoint = const.ORDER_ENDPOINT.format(outlet_ref=outlet_ref)
+
+        # Build redirect URL that includes the Odoo transaction reference
+        base_url = self.provider_id._ngenius_get_config()['base_url']
+        redirect_url = f"{base_url}{NGeniusController._return_url}?{url_encode({'reference': self.reference})}"
+
+        payload = {
+            **self._ngenius_prepare_payment_payload(),
+            'merchantAttributes': {
+                'redirectUrl': redirect_url,
+                'skipConfirmationPage': True,
+            },
+        }
 
         response_data = self.provider_id._ngenius_make_request(
             'POST', endpoint, data=payload, access_token=access_token
@@ -114,6 +150,126 @@ class PaymentTransaction(models.Model):
             'payment_url': payment_link,
         }
 
+    def _ngenius_create_hosted_session_payment(self, session_id, outlet_ref):
+        """Pay the transaction with the card captured by the embedded card form.
+
+        The resulting payment is applied to the transaction right away, so that frictionless
+        payments need neither a redirection nor a verification call.
+
+        Note: self.ensure_one()
+
+        :param str session_id: The hosted session id generated by the N-Genius SDK
+        :param str outlet_ref: The outlet the embedded card form was mounted for
+        :return: The payment data from N-Genius, needed by the SDK to run a 3DS challenge
+        :rtype: dict
+        :raise ValidationError: If the transaction is not payable with the embedded card form, if
+                                the outlet or the session id is invalid or if the payment request
+                                fails
+        """
+        self.ensure_one()
+
+        # Only pay once: lock the transaction while it is draft, for the duration of the request,
+        # so that concurrent calls with other session ids cannot charge the card again.
+        self.flush_recordset(['state'])
+        self.env.cr.execute(
+            'SELECT id FROM payment_transaction WHERE id = %s AND state = %s '
+            'FOR NO KEY UPDATE SKIP LOCKED',
+            [self.id, 'draft'],
+        )
+        if not self.env.cr.fetchone():
+            raise ValidationError(_(
+                "N-Genius: The transaction %s is already processed or being processed",
+                self.reference,
+            ))
+        if self.provider_id.ngenius_payment_flow != 'embedded':
+            raise ValidationError(_("N-Genius: The embedded card form is not enabled"))
+
+        if not self.provider_id._ngenius_is_outlet_ref_allowed(outlet_ref, self.currency_id):
+            raise ValidationError(_("N-Genius: Unknown outlet reference %s", outlet_ref))
+        if not isinstance(session_id, str) or not re.fullmatch(
+            const.HOSTED_SESSION_ID_PATTERN, session_id
+        ):
+            raise ValidationError(_("N-Genius: Invalid hosted session id"))
+
+        access_token = self.provider_id._ngenius_get_access_token()
+        self.ngenius_outlet_ref = outlet_ref
+        endpoint = const.HOSTED_SESSION_PAYMENT_ENDPOINT.format(
+            outlet_ref=outlet_ref, session_id=session_id
+        )
+        payment = self.provider_id._ngenius_make_request(
+            'POST', endpoint, data=self._ngenius_prepare_payment_payload(),
+            access_token=access_token,
+        )
+        self._ngenius_archive_payload('order', payment)
+
+        # Wrap the payment in an order-shaped payload so that it is processed like the others
+        payment_data = {
+            'reference': self.reference,
+            'order_data': {
+                'reference': payment.get('orderReference', ''),
+                'state': payment.get('state', ''),
+                '_embedded': {'payment': [payment]},
+            },
+        }
+        self._process('ngenius', payment_data)
+        return payment
+
+    def _ngenius_fetch_order_data(self, order_ref=None):
+        """Fetch the order details from N-Genius and process them.
+
+        Note: self.ensure_one()
+
+        :param str order_ref: The N-Genius order reference, defaults to the provider reference
+        :return: None
+        :raise ValidationError: If the order cannot be fetched
+        """
+        self.ensure_one()
+
+        order_ref = order_ref or self.provider_reference
+        if not order_ref:
+            _logger.warning("N-Genius: No order reference to fetch - cannot verify payment")
+            self._set_error(_("Payment could not be verified - no order reference"))
+            return
+
+        access_token = self.provider_id._ngenius_get_access_token()
+        outlet_ref = self._ngenius_get_outlet_ref()
+        endpoint = const.ORDER_DETAIL_ENDPOINT.format(outlet_ref=outlet_ref, order_ref=order_ref)
+        order_data = self.provider_id._ngenius_make_request(
+            'GET', endpoint, access_token=access_token
+        )
+        self._ngenius_archive_payload('order', order_data)
+
+        payment_data = {
+            'reference': self.reference,
+            'order_data': order_data,
+        }
+        self._process('ngenius', payment_data)
+
+    def _ngenius_get_outlet_ref(self):
+        """Return the outlet the transaction was routed to.
+
+        Transactions created before outlet routing fall back on the provider's outlet.
+
+        Note: self.ensure_one()
+
+        :return: The outlet reference
+        :rtype: str
+        """
+        self.ensure_one()
+        return self.ngenius_outlet_ref or self.provider_id._ngenius_get_config()['outlet_ref']
+
+    def _ngenius_archive_payload(self, kind, payload):
+        """Archive a raw payload received from N-Genius for the transaction.
+
+        Note: self.ensure_one()
+
+        :param str kind: The kind of payload: `order` or `refund`.
+        :param dict payload: The payload received from N-Genius.
+        :return: None
+        """
+        self.ensure_one()
+        self.env['payment.ngenius.payload'].sudo()._ngenius_archive(self.reference, kind, payload)
+
     def _send_payment_request(self):
         """Override of `payment` to send a payment request to N-Genius."""
         if self.provider_code != 'ngenius':
@@ -129,7 +285,9 @@ class PaymentTransaction(models.Model):
             return super()._send_refund_request()
 
         access_token = self.provider_id._ngenius_get_access_token()
-        outlet_ref = ngenius_utils.get_outlet_ref(self.provider_id.sudo())
+        # Refund through the outlet that took the payment
+        outlet_ref = self.source_transaction_id._ngenius_get_outlet_ref()
+        self.ngenius_outlet_ref = outlet_ref
         
         # Extract order and payment refs from source transaction
         order_ref = self.source_transaction_id.provider_reference
@@ -166,6 +324,7 @@ class PaymentTransaction(models.Model):
             data={'amount': {'currencyCode': self.currency_id.name, 'value': amount_minor}},
             access_token=access_token,
         )
+        self._ngenius_archive_payload('refund', refund_data)
 
         # Process refund response
         payment_data = {
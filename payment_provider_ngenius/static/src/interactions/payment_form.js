@@ -0,0 +1,149 @@
+/* global NI */
+
+import { _t } from '@web/core/l10n/translation';
+import { loadJS } from '@web/core/assets';
+import { rpc, RPCError } from '@web/core/network/rpc';
+import { patch } from '@web/core/utils/patch';
+
+import { PaymentForm } from '@payment/interactions/payment_form';
+
+patch(PaymentForm.prototype, {
+
+    setup() {
+        super.setup();
+        this.ngeniusMountedContainers = new Set();
+        this.ngeniusSessionId = undefined;
+        this.ngeniusOutletRef = undefined;
+    },
+
+    // #=== DOM MANIPULATION ===#
+
+    /**
+     * Mount the N-Genius embedded card form when the embedded flow is configured.
+     *
+     * @override method from @payment/interactions/payment_form
+     * @private
+     * @param {number} providerId - The id of the selected payment option's provider.
+     * @param {string} providerCode - The code of the selected payment option's provider.
+     * @param {number} paymentOptionId - The id of the selected payment option.
+     * @param {string} paymentMethodCode - The code of the selected payment method, if any.
+     * @param {string} flow - The online payment flow of the selected payment option.
+     * @return {void}
+     */
+    async _prepareInlineForm(providerId, providerCode, paymentOptionId, paymentMethodCode, flow) {
+        if (providerCode !== 'ngenius') {
+            await super._prepareInlineForm(...arguments);
+            return;
+        }
+
+        const container = this._ngeniusGetContainer('o_ngenius_element_container');
+        if (flow === 'token' || !container) {
+            return; // Keep the redirect flow of the Hosted Payment Page.
+        }
+        this._setPaymentFlow('direct');
+
+        const inlineFormValues = JSON.parse(container.dataset.ngeniusInlineFormValues);
+        this.ngeniusOutletRef = inlineFormValues['outlet_ref'];
+        if (this.ngeniusMountedContainers.has(container.id)) {
+            return; // The card form is already mounted.
+        }
+        await this.waitFor(loadJS(inlineFormValues['sdk_url']));
+        NI.mountCardInput(container.id, {
+            apiKey: inlineFormValues['api_key'],
+            outletRef: inlineFormValues['outlet_ref'],
+            onSuccess: () => {},
+            onFail: () => this._displayErrorDialog(
+                _t("Payment processing failed"), _t("The card form could not be loaded.")
+            ),
+        });
+        this.ngeniusMountedContainers.add(container.id);
+    },
+
+    // #=== PAYMENT FLOW ===#
+
+    /**
+     * Generate the hosted session from the card form before creating the transaction.
+     *
+     * @override method from @payment/interactions/payment_form
+     * @private
+     * @param {string} providerCode - The code of the selected payment option's provider.
+     * @param {number} paymentOptionId - The id of the selected payment option.
+     * @param {string} paymentMethodCode - The code of the selected payment method, if any.
+     * @param {string} flow - The payment flow of the selected payment option.
+     * @return {void}
+     */
+    async _initiatePaymentFlow(providerCode, paymentOptionId, paymentMethodCode, flow) {
+        if (providerCode !== 'ngenius' || flow !== 'direct') {
+            await super._initiatePaymentFlow(...arguments);
+            return;
+        }
+
+        try {
+            const response = await this.waitFor(NI.generateSessionId());
+            this.ngeniusSessionId = response['session_id'];
+        } catch (error) {
+            this._displayErrorDialog(_t("Incorrect payment details"), error?.message);
+            this._enableButton();
+            return;
+        }
+        await super._initiatePaymentFlow(...arguments);
+    },
+
+    /**
+     * Pay with the hosted session and run the 3DS challenge if the issuer requires one.
+     *
+     * @override method from @payment/interactions/payment_form
+     * @private
+     * @param {string} providerCode - The code of the selected payment option's provider.
+     * @param {number} paymentOptionId - The id of the selected payment option.
+     * @param {string} paymentMethodCode - The code of the selected payment method, if any.
+     * @param {object} processingValues - The processing values of the transaction.
+     * @return {void}
+     */
+    async _processDirectFlow(providerCode, paymentOptionId, paymentMethodCode, processingValues) {
+        if (providerCode !== 'ngenius') {
+            await super._processDirectFlow(...arguments);
+            return;
+        }
+
+        const params = {
+            'reference': processingValues['reference'],
+            'access_token': processingValues['access_token'],
+        };
+        try {
+            const payment = await this.waitFor(rpc('/payment/ngenius/hosted_session', {
+                ...params,
+                'session_id': this.ngeniusSessionId,
+                'outlet_ref': this.ngeniusOutletRef,
+            }));
+            if (payment['state'] === 'AWAIT_3DS') {
+                const container = this._ngeniusGetContainer('o_ngenius_3ds_container');
+                await this.waitFor(NI.handlePaymentResponse(payment, { mountId: container.id }));
+                await this.waitFor(rpc('/payment/ngenius/hosted_session/verify', params));
+            }
+            window.location = '/payment/status';
+        } catch (error) {
+            if (error instanceof RPCError) {
+                this._displayErrorDialog(_t("Payment processing failed"), error.data.message);
+                this._enableButton();
+            } else {
+                return Promise.reject(error);
+            }
+        }
+    },
+
+    // #=== HELPERS ===#
+
+    /**
+     * Return the element of the selected inline form matching the given name.
+     *
+     * @private
+     * @param {string} name - The name of the element.
+     * @return {HTMLElement|null}
+     */
+    _ngeniusGetContainer(name) {
+        const radio = this.el.querySelector('input[name="o_payment_radio"]:checked');
+        return this._getInlineForm(radio)?.querySelector(`[name="${name}"]`) ?? null;
+    },
+
+});
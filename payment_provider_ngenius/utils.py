@@ -1,5 +1,11 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
 
 def get_api_key(provider_sudo):
     """Return the API key for N-Genius.
@@ -57,3 +63,62 @@ def include_billing_address(tx_sudo):
     """
     tx_sudo.ensure_one()
     return format_billing_address(tx_sudo.partner_id)
+
+
+def check_webhook_signature(body, secret_header, signature_header, secrets):
+    """Check that the webhook request is authenticated by one of the configured secrets.
+
+    The request is accepted if it carries either the shared secret itself or the HMAC-SHA256 of
+    its body signed with the shared secret. Both are compared in constant time.
+
+    :param bytes body: The raw body of the request.
+    :param str secret_header: The value of the shared secret header, if any.
+    :param str signature_header: The value of the signature header, if any.
+    :param tuple secrets: The webhook secrets of the N-Genius providers.
+    :return: Whether the request is authenticated.
+    :rtype: bool
+    """
+    for secret in secrets:
+        if signature_header:
+            expected_signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            # Compare bytes, as `compare_digest` rejects non-ASCII strings with a TypeError.
+            if hmac.compare_digest(expected_signature.encode(), signature_header.lower().encode()):
+                return True
+        elif secret_header and hmac.compare_digest(secret.encode(), secret_header.encode()):
+            return True
+    return False
+
+
+class TokenBucketThrottle:
+    """Thread-safe per-key token bucket throttle.
+
+    Each key starts with `burst` tokens and regains `refill_rate` tokens per second, up to
+    `burst`. A request is allowed if a token can be taken from the bucket of its key. At most
+    `max_keys` keys are tracked; the least recently seen ones are forgotten first.
+    """
+
+    def __init__(self, burst, refill_rate, max_keys):
+        self.burst = burst
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # {key: (tokens, last_refill_time)}, least recent first
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Take a token from the bucket of the key.
+
+        :param str key: The key to throttle, e.g. the source IP.
+        :return: Whether a token was available.
+        :rtype: bool
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last_refill_time = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last_refill_time) * self.refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)  # Forget the least recently seen key.
+            self._buckets[key] = (tokens, now)
+            return allowed